@@ -1,69 +1,232 @@
+import functools
 import json
+import os
+import threading
+from collections import defaultdict
+from dataclasses import dataclass, replace
 from flask import Flask, render_template, request, jsonify, abort
 
+try:
+    import orjson
+except ImportError:
+    # orjson is optional; the stdlib json module is used when it's missing
+    orjson = None
+
 # Initialize the Flask application
 app = Flask(__name__)
 
-# Global list to hold the product data
-PRODUCTS = []
+PRODUCTS_FILE = 'products.json'
+
+# Values filled in for product keys the filters need but products.json may omit
+_DEFAULTS = {'storage': 'N/A', 'processor': 'N/A', 'camera': 'N/A', 'battery': 'N/A'}
+
+# Keys every product needs for the search columns and indexes
+_REQUIRED_KEYS = ('id', 'name', 'brand', 'category', 'price')
+
+# Price range key -> (min price, max price), max is exclusive
+PRICE_RANGES = {
+    'below_20k': (0, 20000),
+    '20k_50k': (20000, 50000),
+    '50k_100k': (50000, 100000),
+    'over_100k': (100000, float('inf'))
+}
+
+@dataclass(frozen=True, eq=False)
+class _Catalog:
+    """One load of products.json together with everything derived from it.
+
+    Requests read the current catalog once and use only that object, so a reload
+    in another thread can never mix old products with new indexes.
+    """
+    mtime: int
+    products: tuple
+    # Per-product columns aligned with products (position i describes products[i]),
+    # so filters read values by position instead of from each product dict
+    search_text: tuple  # lowercased "name/brand/category" text
+    price_band: tuple   # PRICE_RANGES key the price falls in
+    categories: tuple
+    brands: tuple
+    processors: tuple
+    cameras: tuple
+    batteries: tuple
+    storage: tuple
+    # Product id -> product, for the detail page
+    by_id: dict
+    # Category name -> positions of that category's products
+    by_category: dict
+    # Unique values shown as filter options on the homepage
+    filter_options: dict
+
+# Current catalog, replaced as a whole whenever products.json changes
+_CATALOG = None
+_CACHE_LOCK = threading.Lock()
 
 # --- Data Loading Function ---
 def load_products():
-    """Loads product data from products.json."""
-    global PRODUCTS
+    """Returns the current catalog, reloading products.json only when its mtime has changed."""
+    global _CATALOG
     try:
-        # NOTE: Agar aapka products.json file bilkul naye data se bhara hai,
-        # aur aapne naye keys (jaise 'storage') add nahi kiye hain, toh
-        # ho sakta hai ki yeh data loading mein error de. Dummy keys (storage)
-        # ko hum yahan default value de rahe hain taki error na aaye.
-        with open('products.json', 'r') as f:
-            data = json.load(f)
-            # Default values for any missing keys needed by filters
-            for p in data:
-                p['storage'] = p.get('storage', 'N/A')
-                p['processor'] = p.get('processor', 'N/A')
-                p['camera'] = p.get('camera', 'N/A')
-                p['battery'] = p.get('battery', 'N/A')
-            PRODUCTS = data
-    except Exception as e:
-        print(f"Error loading products.json: {e}. Starting with empty list.")
-        PRODUCTS = []
+        mtime = os.stat(PRODUCTS_FILE).st_mtime_ns
+    except OSError:
+        mtime = None
 
-# Load products when the application starts
-load_products()
+    # Fast path without the lock: nothing to do while the file is unchanged
+    catalog = _CATALOG
+    if catalog is not None and catalog.mtime == mtime:
+        return catalog
 
-# --- Helper Functions ---
+    with _CACHE_LOCK:
+        # Another thread may have reloaded while we waited for the lock
+        catalog = _CATALOG
+        if catalog is not None and catalog.mtime == mtime:
+            return catalog
+        try:
+            with open(PRODUCTS_FILE, 'rb') as f:
+                raw = f.read()
+            data = orjson.loads(raw) if orjson else json.loads(raw)
+            catalog = _build_indexes(_valid_products(data), mtime)
+        except Exception as e:
+            if catalog is None:
+                print(f"Error loading {PRODUCTS_FILE}: {e}. Starting with empty list.")
+                catalog = _build_indexes([], mtime)
+            else:
+                # A bad save shouldn't wipe out a working catalog: keep serving the
+                # last good one, tagged with this mtime so we don't re-parse per request
+                print(f"Error loading {PRODUCTS_FILE}: {e}. Keeping the last good catalog.")
+                catalog = replace(catalog, mtime=mtime)
+        # Publish before clearing, so a search that stores a result for the old
+        # catalog after this clear will see the swap and clear it (search_products)
+        _CATALOG = catalog
+        _filter_positions.cache_clear()
+        return catalog
 
-def is_in_price_range(price, price_range_key):
-    """Checks if a price falls within a specific predefined range."""
-    ranges = {
-        'below_20k': (0, 20000),
-        '20k_50k': (20000, 50000),
-        '50k_100k': (50000, 100000),
-        'over_100k': (100000, float('inf'))
-    }
-    if price_range_key in ranges:
-        min_price, max_price = ranges[price_range_key]
-        return min_price <= price < max_price
-    return False
+def _valid_products(data):
+    """Returns the products that can be indexed, skipping (and logging) malformed records one by one."""
+    valid = []
+    for p in data:
+        if (isinstance(p, dict) and all(key in p for key in _REQUIRED_KEYS)
+                and all(isinstance(p[key], str) for key in ('name', 'brand', 'category'))
+                and isinstance(p['price'], (int, float))):
+            valid.append(p)
+        else:
+            print(f"Skipping malformed product in {PRODUCTS_FILE}: {p!r}")
+    return valid
+
+def _build_indexes(data, mtime):
+    """Precomputes per-product lookup data so requests don't redo it per row."""
+    # NOTE: Agar aapka products.json file bilkul naye data se bhara hai,
+    # aur aapne naye keys (jaise 'storage') add nahi kiye hain, toh
+    # ho sakta hai ki yeh data loading mein error de. Missing keys (storage)
+    # ko hum yahan _DEFAULTS se value de rahe hain taki error na aaye.
+    # Filled into the product dicts themselves (once per reload) so the JSON API
+    # and templates keep seeing every key.
+    for p in data:
+        for key, default in _DEFAULTS.items():
+            p.setdefault(key, default)
+    categories = tuple(p['category'].lower() for p in data)
+    processors = tuple(p['processor'] for p in data)
+    cameras = tuple(p['camera'] for p in data)
+    batteries = tuple(p['battery'] for p in data)
+    storage = tuple(p['storage'] for p in data)
+    by_category = defaultdict(list)
+    for i, category in enumerate(categories):
+        by_category[category].append(i)
+    return _Catalog(
+        mtime=mtime,
+        products=tuple(data),
+        # Fields are joined with a newline so a query can't match across two fields
+        search_text=tuple('\n'.join((p['name'], p['brand'], p['category'])).lower() for p in data),
+        price_band=tuple(_price_band(p['price']) for p in data),
+        categories=categories,
+        brands=tuple(p['brand'] for p in data),
+        processors=processors,
+        cameras=cameras,
+        batteries=batteries,
+        storage=storage,
+        # Built in reverse so a duplicated id maps to its first product, as a linear scan would
+        by_id={p['id']: p for p in reversed(data)},
+        by_category=dict(by_category),
+        filter_options={
+            'brands': sorted({p['brand'] for p in data}),
+            'processors': sorted(set(processors) - {'N/A'}),
+            'cameras': sorted(set(cameras) - {'None'}),
+            'batteries': sorted(set(batteries) - {'N/A'}),
+            'storage': sorted(set(storage) - {'N/A'}),
+        },
+    )
+
+def _price_band(price):
+    """Returns the PRICE_RANGES key whose bounds contain price, or None."""
+    for key, (min_price, max_price) in PRICE_RANGES.items():
+        if min_price <= price < max_price:
+            return key
+    return None
+
+@functools.lru_cache(maxsize=512)
+def _filter_positions(catalog, keyword, category, brands, processors, cameras, batteries, storage, price_ranges):
+    """Returns the catalog positions matching a search, memoized per catalog and filter combination."""
+    # catalog is part of the cache key (it hashes by identity), so a result computed
+    # against an old catalog can never be served for a newer one
+    # 1. 💥 YAHAN HUM CATEGORY FILTER SABSE PEHLE APPLY KARTE HAIN 💥
+    # Start with the selected category's bucket, or with all products
+    if category:
+        candidates = catalog.by_category.get(category, [])
+    else:
+        candidates = range(len(catalog.products))
+
+    # 2. Chain a lazy filter() stage for each active filter only, so rows never
+    # pay for inactive checks and the candidates are still walked just once
+    # (Ab yeh filters sirf selected category par lagenge)
+    positions = candidates
+    categories = catalog.categories
+
+    # A. Brand Filter
+    if brands:
+        brand_col = catalog.brands
+        positions = filter(lambda i: brand_col[i] in brands, positions)
+
+    # B. Processor Filter (Mobile/Laptop)
+    if processors:
+        processor_col = catalog.processors
+        positions = filter(lambda i: categories[i] not in ('tv', 'earphone') and processor_col[i] in processors,
+                           positions)
+
+    # C. Camera Filter (Mobile only)
+    if cameras:
+        camera_col = catalog.cameras
+        positions = filter(lambda i: categories[i] != 'mobile' or camera_col[i] in cameras, positions)
+
+    # D. Battery Filter (Mobile only)
+    if batteries:
+        battery_col = catalog.batteries
+        positions = filter(lambda i: categories[i] != 'mobile' or battery_col[i] in batteries, positions)
 
-def matches_filter(product, key, selections):
-    """Checks if a product's attribute matches any selected option."""
-    if not selections:
-        return True
-    return product.get(key) in selections
+    # E. Storage Filter (Mobile/Laptop)
+    if storage:
+        storage_col = catalog.storage
+        positions = filter(lambda i: categories[i] not in ('tv', 'earphone') and storage_col[i] in storage,
+                           positions)
+
+    # F. Price Range Filter
+    if price_ranges:
+        price_band = catalog.price_band
+        positions = filter(lambda i: price_band[i] in price_ranges, positions)
+
+    # Keyword Search Filter, last because a substring scan is the costliest check
+    if keyword:
+        search_text = catalog.search_text
+        positions = filter(lambda i: keyword in search_text[i], positions)
+
+    return tuple(positions)
+
+# Load products when the application starts
+load_products()
 
 # --- Homepage Route ---
 @app.route('/')
 def index():
     """Renders the homepage with categories and unique filter options."""
-    
-    # Dynamically extract unique values for filters
-    all_brands = sorted(list(set(p['brand'] for p in PRODUCTS)))
-    all_processors = sorted(list(set(p['processor'] for p in PRODUCTS if p['processor'] != 'N/A')))
-    all_cameras = sorted(list(set(p['camera'] for p in PRODUCTS if p['camera'] != 'None')))
-    all_batteries = sorted(list(set(p['battery'] for p in PRODUCTS if p['battery'] != 'N/A')))
-    all_storage = sorted(list(set(p['storage'] for p in PRODUCTS if p['storage'] != 'N/A')))
+    filter_options = load_products().filter_options
 
     price_ranges = {
         'below_20k': 'Below ₹20,000',
@@ -76,11 +239,11 @@ def index():
     
     return render_template('index.html', 
                            categories=categories,
-                           brands=all_brands,
-                           processors=all_processors,
-                           cameras=all_cameras,
-                           batteries=all_batteries,
-                           storage_options=all_storage,
+                           brands=filter_options['brands'],
+                           processors=filter_options['processors'],
+                           cameras=filter_options['cameras'],
+                           batteries=filter_options['batteries'],
+                           storage_options=filter_options['storage'],
                            price_ranges=price_ranges)
 
 # --- Product Search/Filter Route (Backend Logic) ---
@@ -88,7 +251,8 @@ def index():
 @app.route('/results', methods=['GET'])
 def search_products():
     """Handles search queries and multi-criteria filtering."""
-    
+    catalog = load_products()
+
     # Get inputs
     query = request.args.get('query', '').strip().lower()
     # 💥 YAHAN NAYA INPUT AAYEGA 💥
@@ -103,71 +267,30 @@ def search_products():
     
     is_ajax = request.args.get('is_ajax', 'false').lower() == 'true'
 
-    # Start with all products
-    filtered_products = PRODUCTS
-    
-    # 1. Apply Keyword Search Filter
-    if query:
-        # Agar query mein category ka naam hai toh hum query ko category mein use kar lenge
-        if query in ['mobile', 'laptop', 'tv', 'earphone']:
-             selected_category = query
-        else:
-            filtered_products = [
-                p for p in filtered_products 
-                if query in p['name'].lower() 
-                or query in p['brand'].lower()
-                or query in p['category'].lower()
-            ]
-
-    # 2. 💥 YAHAN HUM CATEGORY FILTER SABSE PEHLE APPLY KARTE HAIN 💥
-    if selected_category:
-        filtered_products = [
-            p for p in filtered_products 
-            if p['category'].lower() == selected_category
-        ]
-
-    # 3. Apply Multi-Criteria Filters (Ab yeh filters sirf selected category par lagenge)
-
-    # A. Brand Filter
-    filtered_products = [p for p in filtered_products if matches_filter(p, 'brand', selected_brands)]
+    # Agar query mein category ka naam hai toh hum query ko category mein use kar lenge
+    keyword = query
+    if query in ['mobile', 'laptop', 'tv', 'earphone']:
+        selected_category = query
+        keyword = ''
 
-    # B. Processor Filter
-    if selected_processors:
-        filtered_products = [
-            p for p in filtered_products 
-            if p['category'] not in ['tv', 'earphone'] and matches_filter(p, 'processor', selected_processors)
-        ]
-
-    # C. Camera Filter (Mobile only)
-    if selected_cameras:
-        filtered_products = [
-            p for p in filtered_products 
-            if p['category'] != 'mobile' or matches_filter(p, 'camera', selected_cameras)
-        ]
-        
-    # D. Battery Filter (Mobile only)
-    if selected_batteries:
-        filtered_products = [
-            p for p in filtered_products 
-            if p['category'] != 'mobile' or matches_filter(p, 'battery', selected_batteries)
-        ]
-        
-    # E. Storage Filter (Mobile/Laptop)
-    if selected_storage:
-        filtered_products = [
-            p for p in filtered_products 
-            if p['category'] not in ['tv', 'earphone'] and matches_filter(p, 'storage', selected_storage)
-        ]
-        
-    # F. Price Range Filter
-    if selected_price_ranges:
-        filtered_products = [
-            p for p in filtered_products
-            if any(is_in_price_range(p['price'], pr) for pr in selected_price_ranges)
-        ]
+    # Selected options as frozensets so identical filter combinations share a cache entry
+    positions = _filter_positions(catalog, keyword, selected_category,
+                                  frozenset(selected_brands),
+                                  frozenset(selected_processors),
+                                  frozenset(selected_cameras),
+                                  frozenset(selected_batteries),
+                                  frozenset(selected_storage),
+                                  frozenset(selected_price_ranges))
+    # If a reload happened while this search ran, its result may have been cached
+    # after the reload's cache_clear(); drop it so the old catalog isn't kept alive
+    if catalog is not _CATALOG:
+        _filter_positions.cache_clear()
+    filtered_products = [catalog.products[i] for i in positions]
 
     # Decide output format
     if is_ajax:
+        if orjson:
+            return app.response_class(orjson.dumps(filtered_products), mimetype='application/json')
         return jsonify(filtered_products)
     else:
         return render_template('results.html', 
@@ -178,16 +301,19 @@ def search_products():
 # --- Product Detail Route ---
 @app.route('/product/<int:product_id>')
 def product_detail(product_id):
-    # ... (No change needed here)
-    product = next((p for p in PRODUCTS if p['id'] == product_id), None)
+    catalog = load_products()
+    product = catalog.by_id.get(product_id)
     
     if product is None:
         abort(404)
         
-    recommendations = [
-        p for p in PRODUCTS 
-        if p['category'] == product['category'] and p['id'] != product_id
-    ][:4]
+    # Stop as soon as we have 4 instead of collecting the whole category
+    recommendations = []
+    for i in catalog.by_category.get(product['category'].lower(), []):
+        if catalog.products[i]['id'] != product_id:
+            recommendations.append(catalog.products[i])
+            if len(recommendations) == 4:
+                break
         
     return render_template('product_detail.html', 
                            product=product,
@@ -198,5 +324,7 @@ def product_detail(product_id):
 def page_not_found(e):
     return render_template('404.html'), 404
 
+# Local development server only; in production run: gunicorn app:app (see gunicorn.conf.py)
+# Debug mode is off unless FLASK_DEBUG is set, which Flask reads itself
 if __name__ == '__main__':
-    app.run(debug=True)
\ No newline at end of file
+    app.run()
\ No newline at end of file
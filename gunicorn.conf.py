@@ -0,0 +1,12 @@
+# Gunicorn settings, picked up automatically by: gunicorn app:app
+import multiprocessing
+
+bind = '0.0.0.0:5000'
+workers = multiprocessing.cpu_count()
+worker_class = 'gthread'
+threads = 4
+
+# Import app.py (and parse products.json) once in the master process;
+# forked workers share that catalog copy-on-write. Each worker still
+# reloads on its own if products.json changes on disk.
+preload_app = True